@@ -5,18 +5,23 @@ import hashlib
 import logging
 import re
 import string
-import time
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
 from datetime import timedelta
-from io import StringIO
+from io import BufferedIOBase, StringIO, TextIOWrapper
 from pathlib import Path
 from tempfile import gettempdir
 from typing import Any, Iterable, Iterator, TextIO, cast
 
 import paramiko
+import pyarrow as pa
+from pyarrow import csv as pacsv
 from tqdm.autonotebook import tqdm
 
 import pandas as pd
+from pandas.api.types import infer_dtype, is_string_dtype
 from pandas.errors import ParserError
 
 from .api import HasBounds, OpenSkyDBAPI, ProgressbarType
@@ -30,6 +35,31 @@ from .time import split_times, timelike, to_datetime
 
 _log = logging.getLogger(__name__)
 
+_impala_prompt = b":21000] > "
+_sync_prefix = "PYOPENSKY_SYNC_"
+# placeholders filled for each chunk of a request
+_time_fields = ("before_time", "after_time", "before_hour", "after_hour")
+# No copy of the chunks before concatenation. With pandas 3, copy-on-write
+# makes it the default and the copy keyword is deprecated (it only warns).
+_concat_options: dict[str, Any] = (
+    dict(copy=False) if int(pd.__version__.split(".")[0]) < 3 else {}
+)
+# low cardinality identifiers, stored as categories on demand
+_categorical_fields = (
+    "icao24",
+    "callsign",
+    "departure",
+    "arrival",
+    "origin",
+    "destination",
+)
+
+_preferred_ciphers = ("aes128-gcm@openssh.com", "aes256-gcm@openssh.com")
+_preferred_digests = (
+    "hmac-sha2-256-etm@openssh.com",
+    "hmac-sha2-512-etm@openssh.com",
+)
+
 
 class ImpalaError(Exception):
     pass
@@ -41,17 +71,121 @@ def open_cache_file(cachename: Path) -> Iterator[TextIO]:
 
     This abstracts away the compression status of the cache file.
     """
-    with cachename.open("rb") as bytes_header:
-        if bytes_header.read(3) == b"\x1f\x8b\x08":
+    # a single open: the gzip magic number is sniffed on the raw file
+    with cachename.open("rb") as raw:
+        compressed = raw.read(3) == b"\x1f\x8b\x08"
+        raw.seek(0)
+        if compressed:
             _log.info("Opening as Gzip {}".format(cachename))
-            with gzip.open(cachename, "rt") as fh:
+            with gzip.open(raw, "rt", encoding="utf-8", errors="replace") as fh:
                 yield fh
         else:
             _log.info("Opening as plain text {}".format(cachename))
-            with cachename.open("r") as fh:
+            with TextIOWrapper(raw, encoding="utf-8", errors="replace") as fh:
                 yield fh
 
 
+def prefer_algorithms(
+    available: tuple[str, ...], preferred: tuple[str, ...]
+) -> tuple[str, ...]:
+    """Move preferred algorithms first in the list, if available."""
+    first = tuple(elt for elt in preferred if elt in available)
+    return first + tuple(elt for elt in available if elt not in first)
+
+
+def in_list(values: Iterable[str]) -> str:
+    """Format values as a list of SQL strings, e.g. 'a','b'."""
+    values = list(values)
+    # an empty iterable yields an empty list, not a single empty string
+    return "'" + "','".join(values) + "'" if values else ""
+
+
+def partition_days(
+    before_hour: pd.Timestamp,
+    after_hour: pd.Timestamp,
+    day_min: pd.Timestamp,
+    day_max: pd.Timestamp,
+    margin: pd.Timedelta,
+) -> tuple[float, float]:
+    """Bounds of the days in flights_data4 relevant to a chunk of the request.
+
+    Flights seen during the chunk of time are looked for within a margin of
+    the chunk, rather than in all the days of the request.
+    """
+    first = max(day_min, (before_hour - margin).floor("1d"))
+    last = min(day_max, (after_hour + margin).ceil("1d"))
+    return first.timestamp(), last.timestamp()
+
+
+def seen_bounds(
+    before_time: pd.Timestamp,
+    after_time: pd.Timestamp,
+    before_hour: pd.Timestamp,
+    after_hour: pd.Timestamp,
+    margin: pd.Timedelta,
+) -> str:
+    """Bounds on firstseen and lastseen for flights relevant to a chunk.
+
+    Records in the chunk are timestamped after both before_time and
+    before_hour, and before both after_time and the end of the last hour
+    partition of the chunk, i.e. after_hour (rounded up to the hour for
+    chunks shorter than one hour). Only flights overlapping this span (within
+    a margin) may be joined, so the condition changes the size of the join,
+    not its result.
+    """
+    first = max(before_time, before_hour) - margin
+    last = min(after_time, after_hour.ceil("1h")) + margin
+    return (
+        f" and firstseen <= {last.timestamp():.0f} "
+        f"and lastseen >= {first.timestamp():.0f}"
+    )
+
+
+def escape_braces(text: str) -> str:
+    """Protect a string from being formatted again by str.format()."""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def as_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """Store identifier columns as categories (few values, many rows)."""
+    return df.astype(
+        {column: "category" for column in _categorical_fields if column in df}
+    )
+
+
+def read_tab_records(records: list[str]) -> pd.DataFrame:
+    """Parse tab-separated records with the multi-threaded Arrow reader.
+
+    Types are inferred as pandas would, except for icao24 and callsign which
+    are always kept as strings (otherwise 1234e5 would be parsed as a float).
+    Arrow would also infer dates and times: these columns are read again as
+    strings.
+    """
+    buffer = pa.py_buffer("".join(records).encode())
+    column_types = {"icao24": pa.string(), "callsign": pa.string()}
+
+    def read() -> pa.Table:
+        return pacsv.read_csv(
+            pa.BufferReader(buffer),
+            read_options=pacsv.ReadOptions(block_size=8 << 20),
+            parse_options=pacsv.ParseOptions(delimiter="\t"),
+            convert_options=pacsv.ConvertOptions(
+                column_types=column_types,
+                strings_can_be_null=True,
+            ),
+        )
+
+    table = read()
+    temporal = [
+        field.name for field in table.schema if pa.types.is_temporal(field.type)
+    ]
+    if len(temporal) > 0:
+        column_types.update((name, pa.string()) for name in temporal)
+        table = read()
+
+    return table.to_pandas()
+
+
 class Impala(OpenSkyDBAPI):
     """Wrapper to OpenSky Impala database
 
@@ -149,6 +283,13 @@ class Impala(OpenSkyDBAPI):
         self.password = impala_password
         self.proxy_command = ssh_proxycommand
         self.connected = False
+        self._transport: None | paramiko.Transport = None
+        # idle Impala shell sessions, one is opened per concurrent request
+        self._sessions: list[paramiko.Channel] = []
+        self._sessions_lock = threading.Lock()
+        # digests of requests without any result, e.g. aircraft not flying
+        self._empty: set[str] = set()
+        self._empty_lock = threading.Lock()
         self.cache_dir = cache_path
         if not self.cache_dir.exists():
             self.cache_dir.mkdir(parents=True)
@@ -165,64 +306,98 @@ class Impala(OpenSkyDBAPI):
         """
         for file in self.cache_dir.glob("*"):
             file.unlink()
+        with self._empty_lock:
+            self._empty.clear()
 
     @staticmethod
     def _read_cache(cachename: Path) -> None | pd.DataFrame:
         _log.info("Reading request in cache {}".format(cachename))
+        # the file is read only once, all checks below work on this buffer
         with open_cache_file(cachename) as fh:
-            s = StringIO()
-            count = 0
-            for line in fh.readlines():
-                # -- no pretty-print style cache (option -B)
-                if re.search("\t", line):
-                    count += 1
-                    s.write(re.sub(" *\t *", ",", line))
-                    s.write("\n")
-                # -- pretty-print style cache
-                if re.match(r"\|.*\|", line):
-                    count += 1
-                    if "," in line:  # this may happen on 'describe table'
-                        return_df = False
-                        break
-                    s.write(re.sub(r" *\| *", ",", line)[1:-2])
-                    s.write("\n")
-            else:
-                return_df = True
+            content = fh.read()
+        lines = content.splitlines(keepends=True)
+
+        tab_lines: list[str] = []
+        pipe_lines: list[str] = []
+        for line in lines:
+            # -- no pretty-print style cache (option -B)
+            if "\t" in line:
+                tab_lines.append(line)
+            # -- pretty-print style cache, i.e. | field | ... |
+            elif line.startswith("|") and line.find("|", 1) > 0:
+                if "," in line:  # this may happen on 'describe table'
+                    return content
+                # padded values (e.g. "NULL     ") would not be recognised
+                # as missing values, nor as numbers, by the parser
+                fields = (field.strip() for field in line.split("|"))
+                pipe_lines.append("|".join(fields) + "\n")
+
+        # Only the lines holding records are passed to the parser,
+        # the rest (echo of the request, prompt, etc.) is ignored.
+        if len(pipe_lines) > 0:
+            # the header we wrote replaces the one output by Impala, and the
+            # empty fields before the first and after the last pipe are dropped
+            header = tab_lines[0].strip().split("\t") if tab_lines else []
+            records = pipe_lines[1:] if header else pipe_lines
+            read_options: dict[str, Any] = dict(
+                sep="|",
+                header=None if header else 0,
+                names=["_first", *header, "_last"] if header else None,
+            )
+        else:
+            records = tab_lines
+            read_options = dict(sep="\t")
 
-            if not return_df:
-                fh.seek(0)
-                return "".join(fh.readlines())
+        if len(records) > 0:
+            df: None | pd.DataFrame = None
+            if len(pipe_lines) == 0:
+                try:
+                    df = read_tab_records(records)
+                except pa.ArrowInvalid as error:
+                    # the pandas parser gives more insight on what went wrong
+                    _log.info("Arrow could not parse: {}".format(error))
 
-            if count > 0:
-                s.seek(0)
+            if df is None:
                 try:
-                    # otherwise pandas would parse 1234e5 as 123400000.0
-                    df = pd.read_csv(s, dtype={"icao24": str, "callsign": str})
+                    df = pd.read_csv(
+                        StringIO("".join(records)),
+                        engine="c",
+                        skipinitialspace=True,
+                        # otherwise pandas would parse 1234e5 as 123400000.0
+                        dtype={"icao24": str, "callsign": str},
+                        **read_options,
+                    )
                 except ParserError as error:
-                    for x in re.finditer(r"line (\d)+,", error.args[0]):
-                        line_nb = int(x.group(1))
-                        with open_cache_file(cachename) as fh:
-                            content = fh.readlines()[line_nb - 1]
+                    content = ""
+                    for x in re.finditer(r"line (\d+),", error.args[0]):
+                        content = records[int(x.group(1)) - 1]
 
                     new_path = Path(gettempdir()) / cachename.name
                     cachename.rename(new_path)
                     raise ImpalaError(
                         Impala._parseErrorMsg.format(path=new_path)
-                        + (error + "\n" + content)
+                        + (str(error) + "\n" + content)
                     )
 
-                if df.shape[0] > 0:
-                    return df.drop_duplicates()
+            if len(pipe_lines) > 0:
+                df = df.iloc[:, 1:-1].rename(columns=str.strip)
 
-        error_msg: None | str = None
-        with open_cache_file(cachename) as fh:
-            output = fh.readlines()
-            if any(elt.startswith("ERROR:") for elt in output):
-                error_msg = "".join(output[:-1])
+            # strip spaces around separators, e.g. in padded callsigns
+            for column in df.columns:
+                if is_string_dtype(df[column]) and (
+                    infer_dtype(df[column], skipna=True) == "string"
+                ):
+                    df[column] = df[column].str.strip()
+
+            if df.shape[0] > 0:
+                return df.drop_duplicates()
 
-        if error_msg is not None:
+        if content.startswith("ERROR:") or "\nERROR:" in content:
             cachename.unlink()
-            raise ImpalaError(error_msg)
+            # the sentinel query (see _send_request) is not part of the error
+            raise ImpalaError(
+                "".join(line for line in lines[:-1] if _sync_prefix not in line)
+            )
 
         return None
 
@@ -243,76 +418,216 @@ class Impala(OpenSkyDBAPI):
         if "callsign" in df.columns and df.callsign.dtype == object:
             df.callsign = df.callsign.str.strip()
 
-        df.icao24 = (
-            df.icao24.apply(int, base=16)
-            .apply(hex)
-            .str.slice(2)
-            .str.pad(6, fillchar="0")
-        )
+        df.icao24 = df.icao24.str.lower().str.zfill(6)
 
         if "rawmsg" in df.columns and df.rawmsg.dtype != str:
             df.rawmsg = df.rawmsg.astype(str).str.strip()
 
         if "squawk" in df.columns:
             df.squawk = (
-                df.squawk.astype(str)
-                .str.split(".")
-                .str[0]
-                .replace({"nan": None})
+                pd.to_numeric(df.squawk, errors="coerce")
+                .astype("Int64")
+                .astype(str)
+                .replace({"<NA>": None})
             )
 
-        time_dict: dict[str, pd.Series] = dict()
-        for colname in [
-            "lastposupdate",
-            "lastposition",
-            "firstseen",
-            "lastseen",
-            "mintime",
-            "maxtime",
-            "time",
-            "timestamp",
-            "day",
-            "hour",
-        ]:
-            if colname in df.columns:
-                time_dict[colname] = pd.to_datetime(
-                    df[colname] * 1e9
-                ).dt.tz_localize("utc")
-
-        return df.assign(**time_dict)
+        time_columns = [
+            colname
+            for colname in (
+                "lastposupdate",
+                "lastposition",
+                "firstseen",
+                "lastseen",
+                "mintime",
+                "maxtime",
+                "time",
+                "timestamp",
+                "day",
+                "hour",
+            )
+            if colname in df.columns
+        ]
+        if len(time_columns) == 0:
+            return df
+
+        # One single conversion for all time columns: values are laid out
+        # column after column, then sliced back into each column.
+        # Seconds are kept as float: mintime and lastposupdate carry decimals.
+        values = df[time_columns].to_numpy(dtype="float64").ravel(order="F")
+        timestamps = pd.to_datetime(values * 1e9, utc=True)
+        n = df.shape[0]
+
+        return df.assign(
+            **{
+                colname: timestamps[i * n : (i + 1) * n]
+                for i, colname in enumerate(time_columns)
+            }
+        )
 
-    def _connect(self) -> None:  # coverage: ignore
-        if self.username == "" or self.password == "":
-            raise RuntimeError("This method requires authentication.")
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        extra_args = dict()
+    def _open_transport(self) -> paramiko.Transport:  # coverage: ignore
+        sock: Any = ("data.opensky-network.org", 2230)
 
         if self.proxy_command is not None and self.proxy_command != "":
             # for instance:
             #    "ssh -W data.opensky-network.org:2230 proxy_machine"
             # or "connect.exe -H proxy_ip:proxy_port %h %p"
             _log.info(f"Using ProxyCommand: {self.proxy_command}")
-            extra_args["sock"] = paramiko.ProxyCommand(self.proxy_command)
-
-        client.connect(
-            "data.opensky-network.org",
-            port=2230,
-            username=self.username,
-            password=self.password,
-            look_for_keys=False,
-            allow_agent=False,
-            compress=True,
-            **extra_args,  # type: ignore
-        )
-        self.stdin, self.stdout, self.stderr = client.exec_command(
-            "-B", bufsize=-1, get_pty=True
+            sock = paramiko.ProxyCommand(self.proxy_command)
+
+        # Larger windows and packets than the defaults (2 MiB and 32 KiB) so
+        # that large results are not throttled by round trips.
+        transport = paramiko.Transport(
+            sock,
+            default_window_size=1 << 24,
+            default_max_packet_size=1 << 18,
         )
+        transport.use_compression(True)
+
+        # Prefer AES-GCM (hardware accelerated on most platforms, no separate
+        # MAC) then encrypt-then-MAC digests, if the server supports them.
+        options = transport.get_security_options()
+        options.ciphers = prefer_algorithms(options.ciphers, _preferred_ciphers)
+        options.digests = prefer_algorithms(options.digests, _preferred_digests)
+
+        # As before with SSHClient and AutoAddPolicy, the host key is not
+        # checked; only the password is used (no key lookup, no agent)
+        transport.connect(username=self.username, password=self.password)
+        # keep idle connections alive between two series of requests
+        transport.set_keepalive(30)
+        return transport
+
+    def _connect(self) -> None:  # coverage: ignore
+        if self.username == "" or self.password == "":
+            raise RuntimeError("This method requires authentication.")
+
+        # Only the shell session is lost when the shell exits: a new one is
+        # opened on the same transport, without a new key exchange and
+        # authentication.
+        if self._transport is None or not self._transport.is_active():
+            self._transport = self._open_transport()
+        else:
+            _log.info("Reusing the SSH transport")
+
+        channel = self._open_session()
+        self.stdin = channel.makefile_stdin("wb", -1)
+        self.stdout = channel.makefile("r", -1)
+        self.stderr = channel.makefile_stderr("r", -1)
         self.connected = True
-        total = ""
-        while len(total) == 0 or total[-10:] != ":21000] > ":
-            b = self.stdout.channel.recv(256)
-            total += b.decode()
+
+    def _open_session(self) -> paramiko.Channel:  # coverage: ignore
+        """Start a new Impala shell on the SSH transport."""
+        transport = cast(paramiko.Transport, self._transport)
+        channel = transport.open_session()
+        channel.get_pty()
+        channel.exec_command("-B")
+        welcome = bytearray()
+        while not welcome.endswith(_impala_prompt):
+            b = channel.recv(65536)
+            if len(b) == 0:
+                channel.close()
+                raise ImpalaError("Connection closed by the server")
+            welcome.extend(b)
+        return channel
+
+    @contextmanager
+    def _session(self) -> Iterator[paramiko.Channel]:  # coverage: ignore
+        """Borrow an idle Impala shell session, or open a new one.
+
+        The Impala shell runs one query at a time: requests sent at the same
+        time go through different sessions on the same SSH transport.
+        """
+        with self._sessions_lock:
+            if self._transport is None or not self._transport.is_active():
+                # all sessions are lost with the transport
+                self._sessions.clear()
+                self.connected = False
+            if not self.connected:
+                _log.info("Connecting the database")
+                self._connect()
+                self._sessions.append(self.stdout.channel)
+            channel: None | paramiko.Channel = None
+            while channel is None and len(self._sessions) > 0:
+                channel = self._sessions.pop()
+                if channel.closed:  # e.g. the shell exited
+                    channel = None
+        if channel is None:
+            _log.info("Opening a new Impala shell session")
+            channel = self._open_session()
+        try:
+            yield channel
+        except BaseException:
+            # the output of an interrupted request would mess the next one
+            channel.close()
+            raise
+        finally:
+            with self._sessions_lock:
+                if not channel.closed:
+                    self._sessions.append(channel)
+                elif channel is self.stdout.channel:
+                    self.connected = False
+
+    def _send_request(
+        self,
+        channel: paramiko.Channel,
+        request: str,
+        columns: str,
+        cachename: Path,
+        compress: bool,
+    ) -> None:  # coverage: ignore
+        _log.info("Sending request: {}".format(request))
+
+        # bug fix for when we write a request with """ starting with \n
+        request = request.replace("\n", " ")
+        _log.info(request)
+
+        # A sentinel query follows the request: the prompt ends the output
+        # only after its result. The token is split in the query so that the
+        # echo of the query does not match.
+        sync = uuid.uuid4().hex
+        token = f"{_sync_prefix}{sync}".encode()
+        channel.send(
+            f"{request};\nselect concat('{_sync_prefix}', '{sync}');\n"
+        )
+        _log.info("Will be writing into {}".format(cachename))
+        # Data is streamed into a partial file, renamed only after the
+        # prompt is back. The reason for that is the connection may stall,
+        # your computer may crash or the programme may exit abruptly in
+        # spite of your (and my) best efforts to handle exceptions: no
+        # corrupted file should ever be found under the cache name.
+        partial = cachename.with_suffix(".partial")
+        _log.info("Opening {}".format(partial))
+        cache_file: BufferedIOBase
+        if compress:
+            # Cache files are written once and read many times: the
+            # fastest compression level is a better trade-off. mtime=0
+            # makes the compressed file only depend on its content.
+            cache_file = gzip.GzipFile(partial, "wb", compresslevel=1, mtime=0)
+        else:
+            cache_file = partial.open("wb")
+        # Bytes are written as received, without decoding: only the tail is
+        # kept to detect the token and prompt, possibly split between chunks.
+        with cache_file as fh:
+            if columns is not None:
+                fh.write(columns.replace(", ", "\t").encode())
+                fh.write(b"\n")
+            keep = max(len(token), len(_impala_prompt))
+            tail = b""
+            synced = False
+            while not (synced and tail.endswith(_impala_prompt)):
+                b = channel.recv(65536)
+                if len(b) == 0:
+                    channel.close()
+                    raise ImpalaError(
+                        "Connection closed, partial results in {}".format(
+                            partial
+                        )
+                    )
+                fh.write(b)
+                window = tail + b
+                synced = synced or token in window
+                tail = window[-keep:]
+        _log.info("Closing {}".format(partial))
+        partial.replace(cachename)
 
     def _impala(
         self,
@@ -321,50 +636,115 @@ class Impala(OpenSkyDBAPI):
         cached: bool = True,
         compress: bool = False,
     ) -> None | pd.DataFrame:  # coverage: ignore
-        digest = hashlib.md5(request.encode("utf8")).hexdigest()
+        encoded_request = request.encode("utf8")
+        digest = hashlib.blake2b(encoded_request, digest_size=16).hexdigest()
+
+        with self._empty_lock:
+            if not cached:
+                self._empty.discard(digest)
+            elif digest in self._empty:
+                _log.info("Empty result for request {}".format(digest))
+                return None
+
         cachename = self.cache_dir / digest
+        # parsed results are kept in a columnar format, read without parsing
+        feather = self.cache_dir / f"{digest}.feather"
+
+        if feather.exists() and not cached:
+            feather.unlink()
+
+        if feather.exists():
+            _log.info("Reading request in cache {}".format(feather))
+            return self._remember(digest, pd.read_feather(feather))
+
+        if not cachename.exists():
+            # cache files used to be named after the md5 digest of the request
+            legacy = self.cache_dir / hashlib.md5(encoded_request).hexdigest()
+            if legacy.exists():
+                legacy.rename(cachename)
 
         if cachename.exists() and not cached:
             cachename.unlink()
 
         if not cachename.exists():
-            _log.info("Sending request: {}".format(request))
-
-            if not self.connected:
-                _log.info("Connecting the database")
-                self._connect()
+            with self._session() as channel:
+                self._send_request(
+                    channel, request, columns, cachename, compress
+                )
 
-            # bug fix for when we write a request with """ starting with \n
-            request = request.replace("\n", " ")
-            _log.info(request)
-
-            self.stdin.channel.send(request + ";\n")
-            # avoid messing lines in the cache file
-            time.sleep(0.1)
-            total = ""
-            _log.info("Will be writing into {}".format(cachename))
-            while len(total) == 0 or total[-10:] != ":21000] > ":
-                b = self.stdout.channel.recv(256)
-                total += b.decode()
-            # There is no direct streaming into the cache file.
-            # The reason for that is the connection may stall, your computer
-            # may crash or the programme may exit abruptly in spite of your
-            # (and my) best efforts to handle exceptions.
-            # If data is streamed directly into the cache file, it is hard to
-            # detect that it is corrupted and should be removed/overwritten.
-            _log.info("Opening {}".format(cachename))
-            if compress:
-                cache_file = gzip.open(cachename, "wt")
+        df = self._read_cache(cachename)
+        if isinstance(df, pd.DataFrame):
+            # the Feather format only supports the default index
+            df = df.reset_index(drop=True)
+            partial = self.cache_dir / f"{digest}.feather.partial"
+            try:
+                df.to_feather(partial, compression="zstd")
+            except pa.ArrowException as error:
+                # e.g. columns with mixed types: keep the text cache file
+                _log.warning("Could not write {}: {}".format(feather, error))
+                partial.unlink(missing_ok=True)
             else:
-                cache_file = cachename.open("w")
-            with cache_file as fh:
-                if columns is not None:
-                    fh.write(re.sub(", ", "\t", columns))
-                    fh.write("\n")
-                fh.write(total)
-            _log.info("Closing {}".format(cachename))
+                partial.replace(feather)
+                cachename.unlink()
+        return self._remember(digest, df)
 
-        return self._read_cache(cachename)
+    def _remember(
+        self, digest: str, df: None | pd.DataFrame
+    ) -> None | pd.DataFrame:
+        """Remember requests without any result, for the session."""
+        # the raw output may also be returned, e.g. to describe a table
+        if df is None or (isinstance(df, pd.DataFrame) and df.empty):
+            with self._empty_lock:
+                self._empty.add(digest)
+        return df
+
+    def _impala_chunks(
+        self,
+        requests: list[str],
+        columns: str,
+        cached: bool,
+        compress: bool,
+        progressbar: ProgressbarType[Any],
+        n_parallel: int,
+    ) -> list[pd.DataFrame]:
+        """Sends requests and collects the non empty results, in order.
+
+        With n_parallel > 1, requests are sent at the same time, each through
+        its own Impala shell session.
+        """
+        cumul: list[pd.DataFrame] = []
+        if n_parallel <= 1:
+            # no worker thread, so that interruptions remain immediate
+            for request in progressbar(requests):
+                df = self._impala(
+                    request, columns=columns, cached=cached, compress=compress
+                )
+                if df is not None and not df.empty:
+                    cumul.append(df)
+            return cumul
+
+        with ThreadPoolExecutor(max_workers=n_parallel) as executor:
+            futures: list[Future[None | pd.DataFrame]] = [
+                executor.submit(
+                    self._impala,
+                    request,
+                    columns=columns,
+                    cached=cached,
+                    compress=compress,
+                )
+                for request in requests
+            ]
+            try:
+                for future in progressbar(futures):
+                    df = future.result()
+                    if df is not None and not df.empty:
+                        cumul.append(df)
+            except BaseException:
+                # do not send the remaining requests
+                for future in futures:
+                    future.cancel()
+                raise
+        return cumul
 
     def request(
         self,
@@ -377,6 +757,7 @@ class Impala(OpenSkyDBAPI):
         cached: bool = True,
         compress: bool = False,
         progressbar: bool | ProgressbarType[Any] = True,
+        n_parallel: int = 1,
     ) -> pd.DataFrame:
         """Splits and sends a custom request.
 
@@ -395,9 +776,12 @@ class Impala(OpenSkyDBAPI):
         :param cached: (default: True) switch to False to force a new request to
             the database regardless of the cached files; delete previous cache
             files;
-        :param compress: (default: False) compress cache files. Reduces disk
-            space occupied at the expense of slightly increased time
-            to load.
+        :param compress: (default: False) compress the text cache file,
+            where results are written as they arrive. Parsed results are
+            always stored in a zstd compressed Feather file, so this only
+            affects outputs kept as text (e.g. describe, empty results).
+        :param n_parallel: (default: 1) number of requests sent at the same
+            time, each of them in a different Impala shell session.
 
         """
 
@@ -419,38 +803,39 @@ class Impala(OpenSkyDBAPI):
 
         progressbar = cast(ProgressbarType[Any], progressbar)
 
-        cumul: list[pd.DataFrame] = []
-        sequence = list(split_times(start_ts, stop_ts, date_delta))
+        requests: list[str] = []
+        sequence = split_times(start_ts, stop_ts, date_delta)
+
+        # the time range is the same for all chunks, only the hours change
+        before_time, after_time = start_ts.timestamp(), stop_ts.timestamp()
 
-        for bt, at, bh, ah in progressbar(sequence):
+        for bt, at, bh, ah in sequence:
             _log.info(
                 f"Sending request between time {bt} and {at} "
                 f"and hour {bh} and {ah}"
             )
 
             request = request_pattern.format(
-                before_time=bt.timestamp(),
-                after_time=at.timestamp(),
+                before_time=before_time,
+                after_time=after_time,
                 before_hour=bh.timestamp(),
                 after_hour=ah.timestamp(),
             )
+            requests.append(request)
 
-            df = self._impala(
-                request,
-                columns="\t".join(columns),
-                cached=cached,
-                compress=compress,
-            )
-
-            if df is None:
-                continue
-
-            cumul.append(df)
+        cumul = self._impala_chunks(
+            requests,
+            columns="\t".join(columns),
+            cached=cached,
+            compress=compress,
+            progressbar=progressbar,
+            n_parallel=n_parallel,
+        )
 
         if len(cumul) == 0:
             return None
 
-        return pd.concat(cumul)
+        return pd.concat(cumul, ignore_index=True, **_concat_options)
 
     def flightlist(
         self,
@@ -466,6 +851,8 @@ class Impala(OpenSkyDBAPI):
         compress: bool = False,
         limit: None | int = None,
         progressbar: bool | ProgressbarType[Any] = True,
+        n_parallel: int = 1,
+        categorical: bool = False,
         **kwargs: Any,
     ) -> pd.DataFrame:
         """Lists flights departing or arriving at a given airport.
@@ -509,10 +896,15 @@ class Impala(OpenSkyDBAPI):
         :param cached: (default: True) switch to False to force a new request to
             the database regardless of the cached files. This option also
             deletes previous cache files;
-        :param compress: (default: False) compress cache files. Reduces disk
-            space occupied at the expense of slightly increased time
-            to load.
+        :param compress: (default: False) compress the text cache file,
+            where results are written as they arrive. Parsed results are
+            always stored in a zstd compressed Feather file, so this only
+            affects outputs kept as text (e.g. describe, empty results).
         :param limit: maximum number of records requested, LIMIT keyword in SQL.
+        :param n_parallel: (default: 1) number of requests sent at the same
+            time, each of them in a different Impala shell session.
+        :param categorical: (default: False) store identifiers (icao24,
+            callsign, airports) as categories, to save memory on large results.
 
         """
 
@@ -522,7 +914,7 @@ class Impala(OpenSkyDBAPI):
             "{other_params}"
         )
         columns = ", ".join(
-            [
+            (
                 "icao24",
                 "firstseen",
                 "estdepartureairport",
@@ -530,7 +922,7 @@ class Impala(OpenSkyDBAPI):
                 "estarrivalairport",
                 "callsign",
                 "day",
-            ]
+            )
         )
 
         start_ts = to_datetime(start)
@@ -551,38 +943,40 @@ class Impala(OpenSkyDBAPI):
 
         progressbar = cast(ProgressbarType[Any], progressbar)
 
-        other_params = ""
+        params: list[str] = []
 
         if isinstance(icao24, str):
-            other_params += "and icao24='{}' ".format(icao24.lower())
+            params.append(f"and icao24='{icao24.lower()}' ")
 
         elif isinstance(icao24, Iterable):
-            icao24 = ",".join("'{}'".format(c.lower()) for c in icao24)
-            other_params += "and icao24 in ({}) ".format(icao24)
+            # a single lower() call on the joined string
+            icao24 = in_list(icao24).lower()
+            params.append(f"and icao24 in ({icao24}) ")
 
         if isinstance(callsign, str):
             if callsign.find("%") > 0 or callsign.find("_") > 0:
-                other_params += "and callsign ilike '{}' ".format(callsign)
+                params.append(f"and callsign ilike '{callsign}' ")
             else:
-                other_params += "and callsign='{:<8s}' ".format(callsign)
+                params.append(f"and callsign='{callsign:<8s}' ")
 
         elif isinstance(callsign, Iterable):
-            callsign = ",".join("'{:<8s}'".format(c) for c in callsign)
-            other_params += "and callsign in ({}) ".format(callsign)
+            callsign = in_list([c.ljust(8) for c in callsign])
+            params.append(f"and callsign in ({callsign}) ")
 
+        before_time, after_time = start_ts.timestamp(), stop_ts.timestamp()
         if departure_airport is not None:
-            other_params += (
-                f"and firstseen >= {start_ts.timestamp()} and "
-                f"firstseen < {stop_ts.timestamp()} "
+            params.append(
+                f"and firstseen >= {before_time} and "
+                f"firstseen < {after_time} "
             )
         else:
-            other_params += (
-                f"and lastseen >= {start_ts.timestamp()} and "
-                f"lastseen < {stop_ts.timestamp()} "
+            params.append(
+                f"and lastseen >= {before_time} and "
+                f"lastseen < {after_time} "
             )
 
         if airport:
-            other_params += (
+            params.append(
                 f"and (estarrivalairport = '{airport}' or "
                 f"estdepartureairport = '{airport}') "
             )
@@ -593,52 +987,65 @@ class Impala(OpenSkyDBAPI):
                 )
         else:
             if departure_airport:
-                other_params += (
+                params.append(
                     f"and estdepartureairport = '{departure_airport}' "
                 )
             if arrival_airport:
-                other_params += f"and estarrivalairport = '{arrival_airport}' "
+                params.append(f"and estarrivalairport = '{arrival_airport}' ")
 
-        cumul = []
-        sequence = list(split_times(start_ts, stop_ts, timedelta(days=1)))
+        requests: list[str] = []
+        sequence = split_times(start_ts, stop_ts, timedelta(days=1))
 
         if limit is not None:
-            other_params += f"limit {limit}"
+            params.append(f"limit {limit}")
+
+        # only the day bounds change from one chunk to the other
+        request_pattern = query_str.format(
+            columns=columns,
+            before_day="{before_day}",
+            after_day="{after_day}",
+            other_params=escape_braces("".join(params)),
+        )
 
-        for bt, at, before_day, after_day in progressbar(sequence):
+        for bt, at, before_day, after_day in sequence:
             _log.info(
                 f"Sending request between time {bt} and {at} "
                 f"and day {before_day} and {after_day}"
             )
 
-            request = query_str.format(
-                columns=columns,
+            request = request_pattern.format(
                 before_day=before_day.timestamp(),
                 after_day=after_day.timestamp(),
-                other_params=other_params,
             )
+            requests.append(request)
 
-            df = self._impala(
-                request, columns=columns, cached=cached, compress=compress
-            )
-
-            if df is None:
-                continue
-
-            df = self._format_dataframe(df)
-
-            cumul.append(df)
+        cumul = self._impala_chunks(
+            requests,
+            columns=columns,
+            cached=cached,
+            compress=compress,
+            progressbar=progressbar,
+            n_parallel=n_parallel,
+        )
 
         if len(cumul) == 0:
             return None
 
-        df = pd.concat(cumul).rename(
+        df = pd.concat(cumul, ignore_index=True, **_concat_options)
+        del cumul  # release chunks before further copies
+
+        df = self._format_dataframe(df)
+
+        df = df.rename(
             columns=dict(
                 estarrivalairport="arrival",
                 estdepartureairport="departure",
             )
         )
 
+        if categorical:
+            df = as_categories(df)
+
         return df
 
     def history(
@@ -665,6 +1072,8 @@ class Impala(OpenSkyDBAPI):
         progressbar: bool | ProgressbarType[Any] = True,
         date_delta: timedelta = timedelta(hours=1),
         count: bool = False,
+        n_parallel: int = 1,
+        categorical: bool = False,
         **kwargs: Any,
     ) -> None | pd.DataFrame:
         """Get Traffic from the OpenSky Impala shell.
@@ -735,10 +1144,15 @@ class Impala(OpenSkyDBAPI):
         :param cached: (default: True) switch to False to force a new request to
             the database regardless of the cached files. This option also
             deletes previous cache files;
-        :param compress: (default: False) compress cache files. Reduces disk
-            space occupied at the expense of slightly increased time
-            to load.
+        :param compress: (default: False) compress the text cache file,
+            where results are written as they arrive. Parsed results are
+            always stored in a zstd compressed Feather file, so this only
+            affects outputs kept as text (e.g. describe, empty results).
         :param limit: maximum number of records requested, LIMIT keyword in SQL.
+        :param n_parallel: (default: 1) number of requests sent at the same
+            time, each of them in a different Impala shell session.
+        :param categorical: (default: False) store identifiers (icao24,
+            callsign, airports) as categories, to save memory on large results.
 
         """
 
@@ -771,25 +1185,31 @@ class Impala(OpenSkyDBAPI):
 
         progressbar = cast(ProgressbarType[Any], progressbar)
 
-        airports_params = [airport, departure_airport, arrival_airport]
-        count_airports_params = sum(x is not None for x in airports_params)
+        count_airports_params = (
+            (airport is not None)
+            + (departure_airport is not None)
+            + (arrival_airport is not None)
+        )
+
+        params: list[str] = [other_params]
 
         if count is True and serials is None:
             other_tables += ", state_vectors_data4.serials s "
 
         if isinstance(serials, Iterable):
             other_tables += ", state_vectors_data4.serials s "
-            other_params += "and s.ITEM in {} ".format(tuple(serials))
+            params.append(f"and s.ITEM in {tuple(serials)} ")
         elif isinstance(serials, int):
             other_tables += ", state_vectors_data4.serials s "
-            other_params += "and s.ITEM = {} ".format(serials)
+            params.append(f"and s.ITEM = {serials} ")
 
         if isinstance(icao24, str):
-            other_params += "and icao24='{}' ".format(icao24.lower())
+            params.append(f"and icao24='{icao24.lower()}' ")
 
         elif isinstance(icao24, Iterable):
-            icao24 = ",".join("'{}'".format(c.lower()) for c in icao24)
-            other_params += "and icao24 in ({}) ".format(icao24)
+            # a single lower() call on the joined string
+            icao24 = in_list(icao24).lower()
+            params.append(f"and icao24 in ({icao24}) ")
 
         if isinstance(callsign, str):
             if (
@@ -800,18 +1220,18 @@ class Impala(OpenSkyDBAPI):
             ):  # if regex like characters
                 regexp_in_callsign = True
                 if callsign.find("REGEXP("):  # useful for NOT REGEXP()
-                    other_params += f"and RTRIM(callsign) {callsign} "
+                    params.append(f"and RTRIM(callsign) {callsign} ")
                 else:
-                    other_params += f"and RTRIM(callsign) REGEXP('{callsign}') "
+                    params.append(f"and RTRIM(callsign) REGEXP('{callsign}') ")
 
             elif callsign.find("%") >= 0 or callsign.find("_") >= 0:
-                other_params += "and callsign ilike '{}' ".format(callsign)
+                params.append(f"and callsign ilike '{callsign}' ")
             else:
-                other_params += "and callsign='{:<8s}' ".format(callsign)
+                params.append(f"and callsign='{callsign:<8s}' ")
 
         elif isinstance(callsign, Iterable):
-            callsign = ",".join("'{:<8s}'".format(c) for c in callsign)
-            other_params += "and callsign in ({}) ".format(callsign)
+            callsign = in_list([c.ljust(8) for c in callsign])
+            params.append(f"and callsign in ({callsign}) ")
 
         if bounds is not None:
             if isinstance(bounds, str):
@@ -828,16 +1248,21 @@ class Impala(OpenSkyDBAPI):
             else:
                 west, south, east, north = bounds
 
-            other_params += "and lon>={} and lon<={} ".format(west, east)
-            other_params += "and lat>={} and lat<={} ".format(south, north)
+            params.append(f"and lon>={west} and lon<={east} ")
+            params.append(f"and lat>={south} and lat<={north} ")
 
         day_min = start_ts.floor("1d")
         day_max = stop_ts.ceil("1d")
+        # flights are assumed to last less than one day
+        day_margin = pd.Timedelta("1d")
+        seen_margin = pd.Timedelta(0)
 
         if count_airports_params > 0:
             if isinstance(time_buffer, str):
                 time_buffer = pd.Timedelta(time_buffer)
             buffer_s = time_buffer.total_seconds() if time_buffer else 0
+            seen_margin = pd.Timedelta(seconds=buffer_s)
+            day_margin += seen_margin
             where_clause = (
                 "on icao24 = est.e_icao24 and "
                 "callsign = est.e_callsign and "
@@ -846,6 +1271,9 @@ class Impala(OpenSkyDBAPI):
                 "where"
             )
 
+        # the day bounds of the airport subquery are set for each chunk
+        other_tables = escape_braces(other_tables)
+
         if arrival_airport is not None and departure_airport is not None:
             if airport is not None:
                 raise RuntimeError(
@@ -858,12 +1286,12 @@ class Impala(OpenSkyDBAPI):
                 "callsign as e_callsign, day from flights_data4 "
                 "where estdepartureairport ='{departure_airport}' "
                 "and estarrivalairport ='{arrival_airport}' "
-                "and ({day_min:.0f} <= day and day <= {day_max:.0f})) as est"
+                "and ({{day_min:.0f}} <= day and day <= {{day_max:.0f}})"
+                "{{seen_bounds}}) "
+                "as est"
             ).format(
                 arrival_airport=arrival_airport,
                 departure_airport=departure_airport,
-                day_min=day_min.timestamp(),
-                day_max=day_max.timestamp(),
             )
 
         elif arrival_airport is not None:
@@ -876,11 +1304,11 @@ class Impala(OpenSkyDBAPI):
                 "estdepartureairport, lastseen, estarrivalairport, "
                 "callsign as e_callsign, day from flights_data4 "
                 "where estarrivalairport ='{arrival_airport}' "
-                "and ({day_min:.0f} <= day and day <= {day_max:.0f})) as est"
+                "and ({{day_min:.0f}} <= day and day <= {{day_max:.0f}})"
+                "{{seen_bounds}}) "
+                "as est"
             ).format(
                 arrival_airport=arrival_airport,
-                day_min=day_min.timestamp(),
-                day_max=day_max.timestamp(),
             )
 
         elif departure_airport is not None:
@@ -893,11 +1321,11 @@ class Impala(OpenSkyDBAPI):
                 "estdepartureairport, lastseen, estarrivalairport, "
                 "callsign as e_callsign, day from flights_data4 "
                 "where estdepartureairport ='{departure_airport}' "
-                "and ({day_min:.0f} <= day and day <= {day_max:.0f})) as est"
+                "and ({{day_min:.0f}} <= day and day <= {{day_max:.0f}})"
+                "{{seen_bounds}}) "
+                "as est"
             ).format(
                 departure_airport=departure_airport,
-                day_min=day_min.timestamp(),
-                day_max=day_max.timestamp(),
             )
 
         elif airport is not None:
@@ -907,91 +1335,121 @@ class Impala(OpenSkyDBAPI):
                 "callsign as e_callsign, day from flights_data4 "
                 "where (estdepartureairport ='{arrival_or_departure_airport}' "
                 "or estarrivalairport = '{arrival_or_departure_airport}') "
-                "and ({day_min:.0f} <= day and day <= {day_max:.0f})) as est"
+                "and ({{day_min:.0f}} <= day and day <= {{day_max:.0f}})"
+                "{{seen_bounds}}) "
+                "as est"
             ).format(
                 arrival_or_departure_airport=airport,
-                day_min=day_min.timestamp(),
-                day_max=day_max.timestamp(),
             )
 
-        cumul: list[pd.DataFrame] = []
-        sequence = list(split_times(start_ts, stop_ts, date_delta))
-        columns = ", ".join(f"{field}" for field in self._impala_columns)
-        parse_columns = ", ".join(self._impala_columns)
+        sequence = split_times(start_ts, stop_ts, date_delta)
+        columns = parse_columns = ", ".join(self._impala_columns)
 
         if count_airports_params > 0:
-            est_columns = [
+            est_columns = (
                 "firstseen",
                 "estdepartureairport",
                 "lastseen",
                 "estarrivalairport",
                 "day",
-            ]
+            )
             columns = columns + (
                 ", " + ", ".join(f"est.{field}" for field in est_columns)
             )
             parse_columns = ", ".join(
-                [
+                (
                     *self._impala_columns,
                     "firstseen",
                     "origin",
                     "lastseen",
                     "destination",
                     "day",
-                ]
+                )
             )
 
         if count is True:
-            other_params += "group by " + columns + " "
+            params.append("group by " + columns + " ")
             columns = "count(*) as count, " + columns
             parse_columns = "count, " + parse_columns
 
         if limit is not None:
-            other_params += f"limit {limit}"
+            params.append(f"limit {limit}")
 
-        for bt, at, bh, ah in progressbar(sequence):
+        other_params = "".join(params)
+
+        # Placeholders for the time bounds in other_params are filled for
+        # each chunk. Checked once: without any, braces are kept as they are.
+        templated = not regexp_in_callsign and any(
+            "{" + field in other_params for field in _time_fields
+        )
+
+        # only the time bounds change from one chunk to the other
+        request_pattern = self.basic_request.format(
+            columns=columns,
+            before_time="{before_time}",
+            after_time="{after_time}",
+            before_hour="{before_hour}",
+            after_hour="{after_hour}",
+            other_tables=other_tables,
+            other_params=other_params
+            if templated
+            else escape_braces(other_params),
+            where_clause=escape_braces(where_clause),
+        )
+
+        # the time range is the same for all chunks, only the hours change
+        before_time, after_time = start_ts.timestamp(), stop_ts.timestamp()
+
+        requests: list[str] = []
+        for bt, at, bh, ah in sequence:
             _log.info(
                 f"Sending request between time {bt} and {at} "
                 f"and hour {bh} and {ah}"
             )
 
-            request = self.basic_request.format(
-                columns=columns,
-                before_time=bt.timestamp(),
-                after_time=at.timestamp(),
+            before_day, after_day = partition_days(
+                bh, ah, day_min, day_max, day_margin
+            )
+            # with a limit (exploratory requests), fewer flights are joined
+            flight_bounds = (
+                seen_bounds(start_ts, stop_ts, bh, ah, seen_margin)
+                if limit is not None
+                else ""
+            )
+            request = request_pattern.format(
+                before_time=before_time,
+                after_time=after_time,
                 before_hour=bh.timestamp(),
                 after_hour=ah.timestamp(),
-                other_tables=other_tables,
-                other_params=other_params
-                if regexp_in_callsign  # TODO temporary ugly fix
-                else other_params.format(
-                    before_time=bt.timestamp(),
-                    after_time=at.timestamp(),
-                    before_hour=bh.timestamp(),
-                    after_hour=ah.timestamp(),
-                ),
-                where_clause=where_clause,
+                day_min=before_day,
+                day_max=after_day,
+                seen_bounds=flight_bounds,
             )
+            requests.append(request)
 
-            df = self._impala(
-                request, columns=parse_columns, cached=cached, compress=compress
-            )
-
-            if df is None:
-                continue
-
-            df = self._format_dataframe(df)
-
-            cumul.append(df)
+        cumul = self._impala_chunks(
+            requests,
+            columns=parse_columns,
+            cached=cached,
+            compress=compress,
+            progressbar=progressbar,
+            n_parallel=n_parallel,
+        )
 
         if len(cumul) == 0:
             return None
 
-        df = pd.concat(cumul)  # .sort_values("time")
+        df = pd.concat(cumul, ignore_index=True, **_concat_options)
+        del cumul  # release chunks before further copies
+
+        df = self._format_dataframe(df)
 
         if count is True:
             df = df.assign(count=lambda df: df["count"].astype(int))
 
+        if categorical:
+            df = as_categories(df)
+
         return df
 
     def flarm(
@@ -1060,6 +1518,8 @@ class Impala(OpenSkyDBAPI):
         other_columns: None | str | list[str] = None,
         other_params: str = "",
         progressbar: bool | ProgressbarType[Any] = True,
+        n_parallel: int = 1,
+        categorical: bool = False,
         **kwargs: Any,
     ) -> None | pd.DataFrame:
         """Get raw message from the OpenSky Impala shell.
@@ -1122,66 +1582,40 @@ class Impala(OpenSkyDBAPI):
         :param cached: (default: True) switch to False to force a new request to
             the database regardless of the cached files. This option also
             deletes previous cache files;
-        :param compress: (default: False) compress cache files. Reduces disk
-            space occupied at the expense of slightly increased time
-            to load.
+        :param compress: (default: False) compress the text cache file,
+            where results are written as they arrive. Parsed results are
+            always stored in a zstd compressed Feather file, so this only
+            affects outputs kept as text (e.g. describe, empty results).
         :param limit: maximum number of records requested, LIMIT keyword in SQL.
+        :param n_parallel: (default: 1) number of requests sent at the same
+            time, each of them in a different Impala shell session.
+        :param categorical: (default: False) store identifiers (icao24,
+            callsign, airports) as categories, to save memory on large results.
 
         """
 
         if table_name is None:
             table_name = list(self._raw_tables)
 
-        if not isinstance(table_name, str):  # better than Iterable but not str
-            pieces = list(
-                self.rawdata(
-                    start,
-                    stop,
-                    table_name=table,
-                    date_delta=date_delta,
-                    icao24=icao24,
-                    serials=serials,
-                    bounds=bounds,
-                    callsign=callsign,
-                    departure_airport=departure_airport,
-                    arrival_airport=arrival_airport,
-                    airport=airport,
-                    cached=cached,
-                    limit=limit,
-                    other_tables=other_tables,
-                    other_columns=other_columns,
-                    other_params=other_params,
-                    progressbar=progressbar,
-                )
-                for table in table_name
-            )
-            candidates = [df for df in pieces if df is not None]
-            return pd.concat(candidates)
-
-        _request = (
-            "select {columns} from {table_name} {other_tables} "
-            "{where_clause} hour>={before_hour} and hour<{after_hour} "
-            "and {table_name}.mintime>={before_time} and "
-            "{table_name}.mintime<{after_time} "
-            "{other_params}"
+        # better than Iterable but not str
+        tables = (
+            [table_name] if isinstance(table_name, str) else list(table_name)
         )
+        for table in tables:
+            if table not in self._raw_tables:
+                raise RuntimeError(f"{table} is not a valid table name")
 
-        columns = "mintime, maxtime, rawmsg, msgcount, icao24, hour"
-        if other_columns is not None:
-            if isinstance(other_columns, str):
-                columns += f", {other_columns}"
-            else:
-                columns += ", " + ", ".join(other_columns)
-        parse_columns = columns
-
-        # default obvious parameter
-        where_clause = "where"
-
-        airports_params = [airport, departure_airport, arrival_airport]
-        count_airports_params = sum(x is not None for x in airports_params)
+        # lower case once for all tables (also, iterators are consumed once)
+        if isinstance(icao24, str):
+            icao24 = icao24.lower()
+        elif isinstance(icao24, Iterable):
+            icao24 = [code.lower() for code in icao24]
 
-        if table_name not in self._raw_tables:
-            raise RuntimeError(f"{table_name} is not a valid table name")
+        count_airports_params = (
+            (airport is not None)
+            + (departure_airport is not None)
+            + (arrival_airport is not None)
+        )
 
         start_ts = to_datetime(start)
         stop_ts = (
@@ -1189,6 +1623,7 @@ class Impala(OpenSkyDBAPI):
             if stop is not None
             else start_ts + pd.Timedelta("1d")
         )
+        before_time, after_time = start_ts.timestamp(), stop_ts.timestamp()
 
         if progressbar is True:
             if stop_ts - start_ts > date_delta:
@@ -1201,39 +1636,11 @@ class Impala(OpenSkyDBAPI):
 
         progressbar = cast(ProgressbarType[Any], progressbar)
 
-        if isinstance(icao24, str):
-            other_params += f"and {table_name}.icao24='{icao24.lower()}' "
-        elif isinstance(icao24, Iterable):
-            icao24 = ",".join("'{}'".format(c.lower()) for c in icao24)
-            other_params += f"and {table_name}.icao24 in ({icao24}) "
+        # The subquery selecting aircraft (by callsign, bounds or airports)
+        # and the columns it adds to the result are the same for all tables.
+        subquery = ""
+        est_columns: dict[str, str] = {}
 
-        if isinstance(serials, Iterable):
-            other_tables += f", {table_name}.sensors s "
-            other_params += "and s.serial in {} ".format(tuple(serials))
-            columns = "s.serial, s.mintime as time, " + columns
-            parse_columns = "serial, time, " + parse_columns
-        elif isinstance(serials, int):
-            other_tables += f", {table_name}.sensors s "
-            other_params += "and s.serial = {} ".format((serials))
-            columns = "s.serial, s.mintime as time, " + columns
-            parse_columns = "serial, time, " + parse_columns
-
-        other_params += "and rawmsg is not null "
-
-        day_min = start_ts.floor("1d")
-        day_max = stop_ts.ceil("1d")
-
-        if (
-            count_airports_params > 0
-            or bounds is not None
-            or callsign is not None
-        ):
-            where_clause = (
-                f"on {table_name}.icao24 = est.e_icao24 and "
-                f"est.firstseen <= {table_name}.mintime and "
-                f"{table_name}.mintime <= est.lastseen "
-                "where"
-            )
         if callsign is not None:
             if count_airports_params > 0 or bounds is not None:
                 raise RuntimeError(
@@ -1247,14 +1654,14 @@ class Impala(OpenSkyDBAPI):
                     callsigns = "and callsign='{:<8s}' ".format(callsign)
 
             elif isinstance(callsign, Iterable):
-                callsign = ",".join("'{:<8s}'".format(c) for c in callsign)
+                callsign = in_list([c.ljust(8) for c in callsign])
                 callsigns = "and callsign in ({}) ".format(callsign)
 
-            other_tables += (
+            subquery = (
                 "join (select min(time) as firstseen, max(time) as lastseen, "
                 "icao24  as e_icao24 from state_vectors_data4 "
                 "where hour>={before_hour} and hour<{after_hour} and "
-                f"time>={start_ts.timestamp()} and time<{stop_ts.timestamp()} "
+                f"time>={before_time} and time<{after_time} "
                 f"{callsigns}"
                 "group by icao24) as est "
             )
@@ -1271,15 +1678,18 @@ class Impala(OpenSkyDBAPI):
             else:
                 west, south, east, north = bounds
 
-            other_tables += (
+            subquery = (
                 "join (select min(time) as firstseen, max(time) as lastseen, "
                 "icao24 as e_icao24 from state_vectors_data4 "
                 "where hour>={before_hour} and hour<{after_hour} and "
-                f"time>={start_ts.timestamp()} and time<{stop_ts.timestamp()} "
+                f"time>={before_time} and time<{after_time} "
                 f"and lon>={west} and lon<={east} "
                 f"and lat>={south} and lat<={north} "
                 "group by icao24) as est "
             )
+            est_columns = dict(
+                firstseen="firstseen", lastseen="lastseen", e_icao24="icao24_2"
+            )
 
         elif arrival_airport is not None and departure_airport is not None:
             if airport is not None:
@@ -1287,144 +1697,266 @@ class Impala(OpenSkyDBAPI):
                     "airport may not be set if "
                     "either arrival_airport or departure_airport is set"
                 )
-            other_tables += (
+            subquery = (
                 "join (select icao24 as e_icao24, firstseen, "
                 "estdepartureairport, lastseen, estarrivalairport, "
                 "callsign, day from flights_data4 "
                 "where estdepartureairport ='{departure_airport}' "
                 "and estarrivalairport ='{arrival_airport}' "
-                "and ({day_min:.0f} <= day and day <= {day_max:.0f})) as est"
+                "and ({{day_min:.0f}} <= day and day <= {{day_max:.0f}})"
+                "{{seen_bounds}}) "
+                "as est"
             ).format(
                 arrival_airport=arrival_airport,
                 departure_airport=departure_airport,
-                day_min=day_min.timestamp(),
-                day_max=day_max.timestamp(),
             )
 
         elif arrival_airport is not None:
-            other_tables += (
+            subquery = (
                 "join (select icao24 as e_icao24, firstseen, "
                 "estdepartureairport, lastseen, estarrivalairport, "
                 "callsign, day from flights_data4 "
                 "where estarrivalairport ='{arrival_airport}' "
-                "and ({day_min:.0f} <= day and day <= {day_max:.0f})) as est"
+                "and ({{day_min:.0f}} <= day and day <= {{day_max:.0f}})"
+                "{{seen_bounds}}) "
+                "as est"
             ).format(
                 arrival_airport=arrival_airport,
-                day_min=day_min.timestamp(),
-                day_max=day_max.timestamp(),
             )
 
         elif departure_airport is not None:
-            other_tables += (
+            subquery = (
                 "join (select icao24 as e_icao24, firstseen, "
                 "estdepartureairport, lastseen, estarrivalairport, "
                 "callsign, day from flights_data4 "
                 "where estdepartureairport ='{departure_airport}' "
-                "and ({day_min:.0f} <= day and day <= {day_max:.0f})) as est"
+                "and ({{day_min:.0f}} <= day and day <= {{day_max:.0f}})"
+                "{{seen_bounds}}) "
+                "as est"
             ).format(
                 departure_airport=departure_airport,
-                day_min=day_min.timestamp(),
-                day_max=day_max.timestamp(),
             )
 
         elif airport is not None:
-            other_tables += (
+            subquery = (
                 "join (select icao24 as e_icao24, firstseen, "
                 "estdepartureairport, lastseen, estarrivalairport, "
                 "callsign, day from flights_data4 "
                 "where (estdepartureairport ='{arrival_or_departure_airport}' "
                 "or estarrivalairport = '{arrival_or_departure_airport}') "
-                "and ({day_min:.0f} <= day and day <= {day_max:.0f})) as est"
+                "and ({{day_min:.0f}} <= day and day <= {{day_max:.0f}})"
+                "{{seen_bounds}}) "
+                "as est"
             ).format(
                 arrival_or_departure_airport=airport,
-                day_min=day_min.timestamp(),
-                day_max=day_max.timestamp(),
             )
 
-        fst_columns = [field.strip() for field in columns.split(",")]
-
         if count_airports_params > 1:
-            est_columns = [
-                "firstseen",
-                "estdepartureairport",
-                "lastseen",
-                "estarrivalairport",
-                "day",
-            ]
-            columns = (
-                ", ".join(f"{table_name}.{field}" for field in fst_columns)
-                + ", "
-                + ", ".join(f"est.{field}" for field in est_columns)
+            est_columns = dict(
+                firstseen="firstseen",
+                estdepartureairport="origin",
+                lastseen="lastseen",
+                estarrivalairport="destination",
+                day="day",
             )
-            parse_columns = ", ".join(
-                [
-                    *fst_columns,
-                    "firstseen",
-                    "origin",
-                    "lastseen",
-                    "destination",
-                    "day",
-                ]
+
+        # with several tables, one progress bar over tables, not over chunks
+        table_progressbar: ProgressbarType[Any] = iter
+        if len(tables) > 1:
+            table_progressbar, progressbar = progressbar, iter
+
+        cumul: list[pd.DataFrame] = []
+        for table in table_progressbar(tables):
+            df = self._rawdata_table(
+                table,
+                start_ts,
+                stop_ts,
+                subquery=subquery,
+                est_columns=est_columns,
+                icao24=icao24,
+                serials=serials,
+                date_delta=date_delta,
+                limit=limit,
+                other_tables=other_tables,
+                other_columns=other_columns,
+                other_params=other_params,
+                cached=cached,
+                compress=compress,
+                progressbar=progressbar,
+                n_parallel=n_parallel,
             )
-        if bounds is not None:
+            if df is not None:
+                cumul.append(df)
+
+        if len(cumul) == 0:
+            return None
+
+        if len(cumul) == 1:  # e.g. one table requested
+            df = cumul[0]
+        else:  # tables may come with different columns, keep them in order
+            df = pd.concat(
+                cumul, ignore_index=True, sort=False, **_concat_options
+            )
+
+        if categorical:
+            df = as_categories(df)
+
+        return df
+
+    def _rawdata_table(
+        self,
+        table_name: str,
+        start_ts: pd.Timestamp,
+        stop_ts: pd.Timestamp,
+        *,
+        subquery: str,
+        est_columns: dict[str, str],
+        icao24: None | str | list[str],
+        serials: None | int | Iterable[int],
+        date_delta: timedelta,
+        limit: None | int,
+        other_tables: str,
+        other_columns: None | str | list[str],
+        other_params: str,
+        cached: bool,
+        compress: bool,
+        progressbar: ProgressbarType[Any],
+        n_parallel: int,
+    ) -> None | pd.DataFrame:
+        """Get raw messages from one table, see rawdata().
+
+        :param subquery: a join on a subquery (aliased as est) selecting
+            aircraft, empty if all aircraft are selected;
+        :param est_columns: columns from the subquery to add to the result,
+            mapped to their name in the resulting DataFrame.
+
+        """
+        _request = (
+            "select {columns} from {table_name} {other_tables} "
+            "{where_clause} hour>={before_hour} and hour<{after_hour} "
+            "and {table_name}.mintime>={before_time} and "
+            "{table_name}.mintime<{after_time} "
+            "{other_params}"
+        )
+
+        columns = "mintime, maxtime, rawmsg, msgcount, icao24, hour"
+        if other_columns is not None:
+            if isinstance(other_columns, str):
+                columns += f", {other_columns}"
+            else:
+                columns += ", " + ", ".join(other_columns)
+        parse_columns = columns
+
+        # default obvious parameter
+        where_clause = "where"
+
+        # icao24 is lower case already, see rawdata()
+        if isinstance(icao24, str):
+            other_params += f"and {table_name}.icao24='{icao24}' "
+        elif isinstance(icao24, Iterable):
+            other_params += f"and {table_name}.icao24 in ({in_list(icao24)}) "
+
+        if isinstance(serials, Iterable):
+            other_tables += f", {table_name}.sensors s "
+            other_params += "and s.serial in {} ".format(tuple(serials))
+            columns = "s.serial, s.mintime as time, " + columns
+            parse_columns = "serial, time, " + parse_columns
+        elif isinstance(serials, int):
+            other_tables += f", {table_name}.sensors s "
+            other_params += "and s.serial = {} ".format((serials))
+            columns = "s.serial, s.mintime as time, " + columns
+            parse_columns = "serial, time, " + parse_columns
+
+        other_params += "and rawmsg is not null "
+
+        day_min = start_ts.floor("1d")
+        day_max = stop_ts.ceil("1d")
+        # flights are assumed to last less than one day
+        day_margin = pd.Timedelta("1d")
+
+        # Placeholders for the hour bounds (in other_tables or in the
+        # callsign and bounds subqueries) and for the day and flight bounds
+        # (in the airport subqueries) are filled for each chunk.
+        if "{before_hour}" not in other_tables:
+            other_tables = escape_braces(other_tables)
+
+        if subquery:
+            where_clause = (
+                f"on {table_name}.icao24 = est.e_icao24 and "
+                f"est.firstseen <= {table_name}.mintime and "
+                f"{table_name}.mintime <= est.lastseen "
+                "where"
+            )
+            other_tables += subquery
+
+        if est_columns:
+            fst_columns = [field.strip() for field in columns.split(",")]
             columns = (
                 ", ".join(f"{table_name}.{field}" for field in fst_columns)
                 + ", "
-                + ", ".join(
-                    f"est.{field}"
-                    for field in ["firstseen", "lastseen", "e_icao24"]
-                )
-            )
-            parse_columns = ", ".join(
-                [*fst_columns, "firstseen", "lastseen", "icao24_2"]
+                + ", ".join(f"est.{field}" for field in est_columns)
             )
+            parse_columns = ", ".join([*fst_columns, *est_columns.values()])
 
-        sequence = list(split_times(start_ts, stop_ts, date_delta))
-        cumul = []
+        sequence = split_times(start_ts, stop_ts, date_delta)
 
         if limit is not None:
             other_params += f"limit {limit}"
 
-        for bt, at, bh, ah in progressbar(sequence):
+        # only the hour and day bounds change from one chunk to the other
+        request_pattern = _request.format(
+            columns=columns,
+            table_name=table_name,
+            before_time=int(start_ts.timestamp()),
+            after_time=int(stop_ts.timestamp()),
+            before_hour="{before_hour}",
+            after_hour="{after_hour}",
+            other_tables=other_tables,
+            other_params=escape_braces(other_params),
+            where_clause=escape_braces(where_clause),
+        )
+
+        requests: list[str] = []
+        for bt, at, bh, ah in sequence:
             _log.info(
                 f"Sending request between time {bt} and {at} "
                 f"and hour {bh} and {ah}"
             )
 
-            if "{before_hour}" in other_tables:
-                _other_tables = other_tables.format(
-                    before_hour=bh.timestamp(), after_hour=ah.timestamp()
-                )
-            else:
-                _other_tables = other_tables
-
-            request = _request.format(
-                columns=columns,
-                table_name=table_name,
-                before_time=int(bt.timestamp()),
-                after_time=int(at.timestamp()),
+            before_day, after_day = partition_days(
+                bh, ah, day_min, day_max, day_margin
+            )
+            # with a limit (exploratory requests), fewer flights are joined
+            flight_bounds = (
+                seen_bounds(start_ts, stop_ts, bh, ah, pd.Timedelta(0))
+                if limit is not None
+                else ""
+            )
+            request = request_pattern.format(
                 before_hour=bh.timestamp(),
                 after_hour=ah.timestamp(),
-                other_tables=_other_tables,
-                other_params=other_params,
-                where_clause=where_clause,
+                day_min=before_day,
+                day_max=after_day,
+                seen_bounds=flight_bounds,
             )
+            requests.append(request)
 
-            df = self._impala(
-                request, columns=parse_columns, cached=cached, compress=compress
-            )
-
-            if df is None:
-                continue
-
-            df = self._format_dataframe(df)
-
-            cumul.append(df)
+        cumul = self._impala_chunks(
+            requests,
+            columns=parse_columns,
+            cached=cached,
+            compress=compress,
+            progressbar=progressbar,
+            n_parallel=n_parallel,
+        )
 
         if len(cumul) == 0:
             return None
 
-        return pd.concat(cumul)
+        df = pd.concat(cumul, ignore_index=True, **_concat_options)
+        del cumul  # release chunks before further copies
+
+        return self._format_dataframe(df)
 
     def extended(self, *args: Any, **kwargs: Any) -> None | pd.DataFrame:
         return self.rawdata(
@@ -0,0 +1,601 @@
+import gzip
+import hashlib
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+from pyopensky.impala import (
+    Impala,
+    ImpalaError,
+    as_categories,
+    escape_braces,
+    in_list,
+    partition_days,
+    seen_bounds,
+)
+
+import pandas as pd
+
+# Cache files start with the header written by pyopensky, followed by the
+# output of the Impala shell (with \r\n line endings from the pseudo-terminal)
+
+tab_output = (
+    "icao24\tcallsign\ttime\tonground\tsquawk\thour\n"
+    "[hadoop-1:21000] > select icao24, callsign from state_vectors_data4;\r\n"
+    "Query: select icao24, callsign from state_vectors_data4\r\n"
+    "3C6444\tDLH12   \t1567000000\ttrue\t1000\t1566997200\r\n"
+    "abcd\tAFR292  \t1567000001.5\tNULL\tNULL\t1566997200\r\n"
+    "Fetched 2 row(s) in 0.50s\r\n"
+    "[hadoop-1:21000] > "
+)
+
+pipe_output = (
+    "time\ticao24\tcallsign\tvelocity\n"
+    "+------------+--------+----------+----------+\n"
+    "| time       | icao24 | callsign | velocity |\n"
+    "+------------+--------+----------+----------+\n"
+    "| 1500000000 | 3c6444 | DLH12    | 200.5    |\n"
+    "| 1500000010 | 00abcd | NULL     | NULL     |\n"
+    "+------------+--------+----------+----------+\n"
+    "Fetched 2 row(s) in 0.50s\n"
+)
+
+error_output = (
+    "icao24\tcallsign\n"
+    "[hadoop-1:21000] > select icao24, callsign from nowhere;\r\n"
+    "Query: select icao24, callsign from nowhere\r\n"
+    "ERROR: AnalysisException: Could not resolve table reference: 'nowhere'"
+    "\r\n\r\n"
+    "[hadoop-1:21000] > select concat('PYOPENSKY_SYNC_', '0123');\r\n"
+    "PYOPENSKY_SYNC_0123\r\n"
+    "Fetched 1 row(s) in 0.01s\r\n"
+    "[hadoop-1:21000] > "
+)
+
+describe_output = (
+    "name\ttype\tcomment\n"
+    "+---------+-------------------------------+---------+\n"
+    "| name    | type                          | comment |\n"
+    "+---------+-------------------------------+---------+\n"
+    "| sensors | array<struct<serial:int,      |         |\n"
+    "|         | mintime:double>>              |         |\n"
+    "+---------+-------------------------------+---------+\n"
+)
+
+empty_output = (
+    "icao24\tcallsign\n"
+    "[hadoop-1:21000] > select icao24, callsign from flights_data4;\r\n"
+    "Fetched 0 row(s) in 0.50s\r\n"
+    "[hadoop-1:21000] > "
+)
+
+
+def write_cache(path: Path, content: str, compress: bool) -> Path:
+    if compress:
+        with gzip.open(path, "wt") as fh:
+            fh.write(content)
+    else:
+        path.write_text(content)
+    return path
+
+
+# A request as sent by _impala, and the records the shell answers with
+request = "select icao24, callsign, time from state_vectors_data4"
+columns = "icao24, callsign, time"
+records = (
+    b"3c6444\tDLH12   \t1567000000\r\n"
+    b"4ca863\tSAS\xc3\xa9906 \t1567000001\r\n"  # multi-byte character
+    b"Fetched 2 row(s) in 0.10s\r\n"
+)
+
+
+class FakeShell:
+    """Answers each query like the Impala shell, in chunks of a given size."""
+
+    def __init__(self, output: bytes, size: int = 65536) -> None:
+        self.output = output
+        self.size = size
+        self.sent: list[str] = []
+        self.buffer = b""
+        self.closed = False
+
+    def send(self, data: str) -> None:
+        self.sent.append(data)
+        for query in data.splitlines():
+            self.buffer += query.encode() + b"\r\n"  # echo
+            if query.startswith("select concat("):  # sync sentinel
+                token = "".join(re.findall(r"'(\w+)'", query))
+                self.buffer += token.encode() + b"\r\n"
+            else:
+                self.buffer += self.output
+            self.buffer += b"[hadoop-1:21000] > "
+
+    def recv(self, size: int) -> bytes:
+        data = self.buffer[: min(size, self.size)]
+        self.buffer = self.buffer[len(data) :]
+        return data
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class ClosingShell(FakeShell):
+    """Closes the connection before the end of the output."""
+
+    def send(self, data: str) -> None:
+        self.buffer = self.output
+
+
+class FakeFile:
+    def __init__(self, channel: Any) -> None:
+        self.channel = channel
+
+
+class FakeTransport:
+    def __init__(self, active: bool = True) -> None:
+        self.active = active
+
+    def is_active(self) -> bool:
+        return self.active
+
+
+def connect(opensky: Impala, channel: Any) -> None:
+    """Plug a fake channel in place of the SSH connection."""
+    opensky.stdin = opensky.stdout = FakeFile(channel)
+    opensky._transport = FakeTransport()
+    opensky._sessions = [channel]
+    opensky.connected = True
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_read_tab(tmp_path: Path, compress: bool) -> None:
+    cachename = write_cache(tmp_path / "tab", tab_output, compress)
+    df = Impala._read_cache(cachename)
+
+    assert isinstance(df, pd.DataFrame)
+    assert df.shape == (2, 6)
+    assert df.icao24.tolist() == ["3C6444", "abcd"]
+    assert df.callsign.tolist() == ["DLH12", "AFR292"]
+    assert df.time.dtype == "float64"
+    assert df.squawk.isna().tolist() == [False, True]
+    assert df.onground.isna().tolist() == [False, True]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_read_pipe(tmp_path: Path, compress: bool) -> None:
+    cachename = write_cache(tmp_path / "pipe", pipe_output, compress)
+    df = Impala._read_cache(cachename)
+
+    assert isinstance(df, pd.DataFrame)
+    assert df.columns.tolist() == ["time", "icao24", "callsign", "velocity"]
+    assert df.icao24.tolist() == ["3c6444", "00abcd"]
+    assert df.callsign.iloc[0] == "DLH12"
+    # padded NULL values are missing values, not strings
+    assert df.callsign.isna().iloc[1]
+    assert df.velocity.dtype == "float64"
+    assert df.velocity.isna().tolist() == [False, True]
+
+
+def test_read_error(tmp_path: Path) -> None:
+    cachename = write_cache(tmp_path / "error", error_output, False)
+
+    with pytest.raises(ImpalaError, match="AnalysisException") as info:
+        Impala._read_cache(cachename)
+
+    # the sentinel query is not part of the error message
+    assert "PYOPENSKY_SYNC_" not in str(info.value)
+    # a failed request is not cached
+    assert not cachename.exists()
+
+
+def test_read_describe(tmp_path: Path) -> None:
+    cachename = write_cache(tmp_path / "describe", describe_output, False)
+    content = Impala._read_cache(cachename)
+
+    assert content == describe_output
+
+
+def test_read_empty(tmp_path: Path) -> None:
+    cachename = write_cache(tmp_path / "empty", empty_output, False)
+
+    assert Impala._read_cache(cachename) is None
+
+
+def test_format_identifiers(tmp_path: Path) -> None:
+    cachename = write_cache(tmp_path / "tab", tab_output, False)
+    df = Impala._read_cache(cachename)
+    assert isinstance(df, pd.DataFrame)
+    df = Impala._format_dataframe(df)
+
+    assert df.icao24.tolist() == ["3c6444", "00abcd"]
+    assert df.squawk.iloc[0] == "1000"
+    assert df.squawk.isna().iloc[1]
+
+
+def test_format_times(tmp_path: Path) -> None:
+    cachename = write_cache(tmp_path / "tab", tab_output, False)
+    df = Impala._read_cache(cachename)
+    assert isinstance(df, pd.DataFrame)
+    df = Impala._format_dataframe(df)
+
+    assert df.time.iloc[1] == pd.Timestamp("2019-08-28 13:46:41.5", tz="utc")
+    assert df.hour.iloc[0] == pd.Timestamp("2019-08-28 13:00", tz="utc")
+
+
+@pytest.mark.parametrize(
+    "airports",
+    [
+        ("departure", "arrival"),  # as returned by flightlist()
+        ("origin", "destination"),  # as returned by history() and rawdata()
+    ],
+)
+def test_categories(airports: tuple[str, str]) -> None:
+    departure, arrival = airports
+    df = pd.DataFrame(
+        {
+            "icao24": ["3c6444", "3c6444"],
+            "callsign": ["DLH12", "DLH12"],
+            departure: ["EDDF", "EDDF"],
+            arrival: ["LFPG", None],
+            "firstseen": [1.5e9, 1.6e9],
+        }
+    )
+    dtypes = as_categories(df).dtypes
+
+    assert all(dtypes[column] == "category" for column in df.columns[:-1])
+    assert dtypes["firstseen"] == "float64"
+
+
+def test_escape_braces() -> None:
+    pattern = escape_braces("^SAS[0-9]{3}$")
+
+    assert pattern == "^SAS[0-9]{{3}}$"
+    assert pattern.format() == "^SAS[0-9]{3}$"
+
+
+def test_in_list() -> None:
+    assert in_list(["a", "b"]) == "'a','b'"
+    assert in_list(iter([])) == ""
+
+
+def test_partition_days() -> None:
+    day_min = pd.Timestamp("2021-08-24", tz="utc")
+    day_max = pd.Timestamp("2021-08-27", tz="utc")
+
+    # within one day of the chunk
+    before_day, after_day = partition_days(
+        pd.Timestamp("2021-08-25 09:00", tz="utc"),
+        pd.Timestamp("2021-08-25 10:00", tz="utc"),
+        day_min,
+        day_max,
+        pd.Timedelta("1D"),
+    )
+    assert before_day == pd.Timestamp("2021-08-24", tz="utc").timestamp()
+    assert after_day == pd.Timestamp("2021-08-27", tz="utc").timestamp()
+
+    # but never out of the days of the request
+    before_day, after_day = partition_days(
+        pd.Timestamp("2021-08-24 00:00", tz="utc"),
+        pd.Timestamp("2021-08-24 01:00", tz="utc"),
+        day_min,
+        day_max,
+        pd.Timedelta("1D"),
+    )
+    assert before_day == day_min.timestamp()
+    assert after_day == pd.Timestamp("2021-08-26", tz="utc").timestamp()
+
+
+def test_seen_bounds() -> None:
+    bounds = seen_bounds(
+        pd.Timestamp("2021-08-25 09:10", tz="utc"),
+        pd.Timestamp("2021-08-25 12:00", tz="utc"),
+        pd.Timestamp("2021-08-25 09:00", tz="utc"),
+        pd.Timestamp("2021-08-25 10:00", tz="utc"),
+        pd.Timedelta("10min"),
+    )
+    # records from 09:10 to 10:00 (the end of the chunk) +/- 10 minutes
+    assert bounds == " and firstseen <= 1629886200 and lastseen >= 1629882000"
+
+    bounds = seen_bounds(
+        pd.Timestamp("2021-08-25 09:10", tz="utc"),
+        pd.Timestamp("2021-08-25 12:00", tz="utc"),
+        pd.Timestamp("2021-08-25 10:00", tz="utc"),
+        pd.Timestamp("2021-08-25 10:30", tz="utc"),
+        pd.Timedelta(0),
+    )
+    # records of the 10:00 hour partition, until 11:00
+    assert bounds == " and firstseen <= 1629889200 and lastseen >= 1629885600"
+
+
+def record_requests(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    requests: list[str] = []
+
+    def _impala(self: Impala, request: str, *args: Any, **kwargs: Any) -> None:
+        requests.append(" ".join(request.split()))
+
+    monkeypatch.setattr(Impala, "_impala", _impala)
+    return requests
+
+
+def test_airport_request(monkeypatch: pytest.MonkeyPatch) -> None:
+    requests = record_requests(monkeypatch)
+    opensky = Impala()
+
+    df = opensky.history(
+        start="2021-08-24 00:00",
+        stop="2021-08-24 02:00",
+        airport="ESSA",
+    )
+    assert df is None
+    assert len(requests) == 2
+    # flights are looked for within one day of each chunk, in the request
+    assert "(1629763200 <= day and day <= 1629849600)) as est" in requests[0]
+    assert "firstseen <=" not in requests[0]
+
+    requests.clear()
+    df = opensky.history(
+        start="2021-08-24 00:00",
+        stop="2021-08-24 01:00",
+        airport="ESSA",
+        limit=3,
+    )
+    assert requests == [
+        "select time, icao24, lat, lon, velocity, heading, vertrate, "
+        "callsign, onground, alert, spi, squawk, baroaltitude, geoaltitude, "
+        "lastposupdate, lastcontact, hour, est.firstseen, "
+        "est.estdepartureairport, est.lastseen, est.estarrivalairport, "
+        "est.day from state_vectors_data4 "
+        "join (select icao24 as e_icao24, firstseen, estdepartureairport, "
+        "lastseen, estarrivalairport, callsign as e_callsign, day "
+        "from flights_data4 "
+        "where (estdepartureairport ='ESSA' or estarrivalairport = 'ESSA') "
+        "and (1629763200 <= day and day <= 1629849600) "
+        "and firstseen <= 1629766800 and lastseen >= 1629763200) as est "
+        "on icao24 = est.e_icao24 and callsign = est.e_callsign "
+        "and est.firstseen - 0 <= time and time <= est.lastseen + 0 "
+        "where hour>=1629763200.0 and hour<1629766800.0 "
+        "and time>=1629763200.0 and time<1629766800.0 limit 3"
+    ]
+
+
+def test_rawdata_icao24(monkeypatch: pytest.MonkeyPatch) -> None:
+    requests = record_requests(monkeypatch)
+    opensky = Impala()
+
+    df = opensky.rawdata(
+        start="2021-08-24 00:00",
+        stop="2021-08-24 01:00",
+        icao24=["ABC123", "def456"],
+        table_name=["position_data4", "velocity_data4"],
+    )
+    assert df is None
+    # codes are lower-cased once, for all tables
+    assert "position_data4.icao24 in ('abc123','def456')" in requests[0]
+    assert "velocity_data4.icao24 in ('abc123','def456')" in requests[1]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 47])
+@pytest.mark.parametrize("compress", [False, True])
+def test_impala_stream(tmp_path: Path, size: int, compress: bool) -> None:
+    opensky = Impala()
+    opensky.cache_dir = tmp_path
+    shell = FakeShell(records, size)
+    connect(opensky, shell)
+
+    df = opensky._impala(request, columns=columns, compress=compress)
+
+    # characters, the prompt (and the sentinel) may be split between chunks
+    assert isinstance(df, pd.DataFrame)
+    assert df.icao24.tolist() == ["3c6444", "4ca863"]
+    assert df.callsign.tolist() == ["DLH12", "SAS\u00e9906"]
+    assert shell.buffer == b""
+    # partial files are renamed once the prompt is back
+    assert not any(file.suffix == ".partial" for file in tmp_path.iterdir())
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_impala_closed(tmp_path: Path, compress: bool) -> None:
+    opensky = Impala()
+    opensky.cache_dir = tmp_path
+    connect(opensky, ClosingShell(records[:20]))
+
+    with pytest.raises(ImpalaError, match="partial results"):
+        opensky._impala(request, columns=columns, compress=compress)
+
+    # only the partial file is left, not a truncated cache file
+    (partial,) = tmp_path.iterdir()
+    assert partial.suffix == ".partial"
+    with gzip.open(partial) if compress else partial.open("rb") as fh:
+        assert fh.read() == b"icao24\tcallsign\ttime\n" + records[:20]
+
+
+def test_legacy_cache(tmp_path: Path) -> None:
+    opensky = Impala()
+    opensky.cache_dir = tmp_path
+    # cache files used to be named after the md5 digest of the request
+    legacy = tmp_path / hashlib.md5(request.encode()).hexdigest()
+    legacy.write_text(tab_output)
+
+    df = opensky._impala(request, columns=columns)
+
+    # the file is used (no request is sent) and renamed
+    assert isinstance(df, pd.DataFrame)
+    assert df.shape == (2, 6)
+    assert not legacy.exists()
+
+
+def test_feather_cache(tmp_path: Path) -> None:
+    opensky = Impala()
+    opensky.cache_dir = tmp_path
+    shell = FakeShell(records)
+    connect(opensky, shell)
+    digest = hashlib.blake2b(request.encode(), digest_size=16).hexdigest()
+
+    df = opensky._impala(request, columns=columns)
+
+    # parsed results replace the text cache file
+    assert [file.name for file in tmp_path.iterdir()] == [f"{digest}.feather"]
+    cached = opensky._impala(request, columns=columns)
+    assert isinstance(cached, pd.DataFrame)
+    assert cached.equals(df)
+    assert len(shell.sent) == 1
+
+    # all cache files are replaced with cached=False
+    (tmp_path / digest).write_text(tab_output)
+    df = opensky._impala(request, columns=columns, cached=False)
+    assert isinstance(df, pd.DataFrame)
+    assert df.shape == (2, 3)
+    assert len(shell.sent) == 2
+    assert [file.name for file in tmp_path.iterdir()] == [f"{digest}.feather"]
+
+
+def test_feather_fallback(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    opensky = Impala()
+    opensky.cache_dir = tmp_path
+    connect(opensky, FakeShell(records))
+    digest = hashlib.blake2b(request.encode(), digest_size=16).hexdigest()
+
+    # columns with mixed types cannot be written in the Feather format
+    mixed = pd.DataFrame(dict(icao24=["3c6444", 1234]))
+    monkeypatch.setattr(
+        Impala, "_read_cache", staticmethod(lambda cachename: mixed.copy())
+    )
+    df = opensky._impala(request, columns=columns)
+
+    assert isinstance(df, pd.DataFrame)
+    assert df.equals(mixed)
+    # the text cache file is kept instead
+    assert [file.name for file in tmp_path.iterdir()] == [digest]
+
+
+def test_impala_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    opensky = Impala()
+
+    def _impala(
+        self: Impala, request: str, **kwargs: Any
+    ) -> None | pd.DataFrame:
+        time.sleep(0.01 * (5 - int(request)))  # last requests return first
+        return None if request == "2" else pd.DataFrame(dict(id=[request]))
+
+    monkeypatch.setattr(Impala, "_impala", _impala)
+    cumul = opensky._impala_chunks(
+        list("01234"),
+        columns="id",
+        cached=True,
+        compress=False,
+        progressbar=iter,
+        n_parallel=3,
+    )
+    # results come in the order of requests, without the empty ones
+    assert [df.id.iloc[0] for df in cumul] == ["0", "1", "3", "4"]
+
+
+def test_impala_chunks_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    opensky = Impala()
+    sent: list[str] = []
+
+    def _impala(self: Impala, request: str, **kwargs: Any) -> None:
+        sent.append(request)
+        if request == "1":
+            raise ImpalaError("Connection closed")
+        time.sleep(0.1)
+
+    monkeypatch.setattr(Impala, "_impala", _impala)
+    with pytest.raises(ImpalaError):
+        opensky._impala_chunks(
+            list("0123456789"),
+            columns="id",
+            cached=True,
+            compress=False,
+            progressbar=iter,
+            n_parallel=2,
+        )
+    # the remaining requests are not sent
+    assert len(sent) < 10
+
+
+def test_impala_chunks_serial(monkeypatch: pytest.MonkeyPatch) -> None:
+    opensky = Impala()
+    threads: list[threading.Thread] = []
+
+    def _impala(self: Impala, request: str, **kwargs: Any) -> pd.DataFrame:
+        threads.append(threading.current_thread())
+        return pd.DataFrame(dict(id=[request]))
+
+    monkeypatch.setattr(Impala, "_impala", _impala)
+    cumul = opensky._impala_chunks(
+        list("012"),
+        columns="id",
+        cached=True,
+        compress=False,
+        progressbar=iter,
+        n_parallel=1,
+    )
+    assert [df.id.iloc[0] for df in cumul] == ["0", "1", "2"]
+    # no worker thread with n_parallel=1
+    assert threads == [threading.main_thread()] * 3
+
+
+class FakeChannel:
+    def __init__(self, closed: bool = False) -> None:
+        self.closed = closed
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_session_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    opensky = Impala()
+    connections: list[FakeChannel] = []
+
+    def _connect(self: Impala) -> None:
+        channel = FakeChannel()
+        connections.append(channel)
+        self._transport = FakeTransport()
+        self.stdout = FakeFile(channel)
+        self.connected = True
+
+    monkeypatch.setattr(Impala, "_connect", _connect)
+
+    main, idle, closed = FakeChannel(), FakeChannel(), FakeChannel(True)
+    connect(opensky, main)
+    opensky._transport = transport = FakeTransport()
+    opensky._sessions = [main, idle, closed]
+
+    # closed sessions are dropped from the pool
+    with opensky._session() as channel:
+        assert channel is idle
+    assert opensky._sessions == [main, idle]
+    assert connections == []
+
+    # all sessions are dropped with the transport
+    transport.active = False
+    with opensky._session() as channel:
+        assert connections == [channel]
+    assert opensky._sessions == connections
+
+
+def test_empty_results(tmp_path: Path) -> None:
+    opensky = Impala()
+    opensky.cache_dir = tmp_path
+    shell = FakeShell(b"Fetched 0 row(s) in 0.10s\r\n")
+    connect(opensky, shell)
+
+    assert opensky._impala(request, columns=columns) is None
+    # known empty results are neither requested nor read again
+    for file in tmp_path.iterdir():
+        file.unlink()
+    assert opensky._impala(request, columns=columns) is None
+    assert len(shell.sent) == 1
+
+    # unless asked for, or forgotten with the cache files
+    assert opensky._impala(request, columns=columns, cached=False) is None
+    assert len(shell.sent) == 2
+    opensky.clear_cache()
+    assert opensky._impala(request, columns=columns) is None
+    assert len(shell.sent) == 3